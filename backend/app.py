@@ -10,28 +10,88 @@ AUTONOMOUS DESIGN NOTE:
   callbacks that require a human response anywhere in this file or agent.py.
 """
 
+import functools
 import json
 import os
 import logging
 import queue
+import random
 import re
 import shutil
 import tempfile
 import threading
 import time
-import urllib.request as urlreq
-from datetime import datetime, timezone
+import uuid
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, is_dataclass
+from email.utils import parsedate_to_datetime
+from typing import Iterator
+from urllib.parse import urlsplit
 
 import git
+import requests
 from flask import Flask, request, jsonify, Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from dotenv import load_dotenv
 
+# Checkout locks: flock on POSIX, msvcrt byte-range locks on Windows
+try:
+    import fcntl
+except ImportError:  # pragma: no cover — Windows dev setups
+    fcntl = None
+    import msvcrt
+
+# pygit2 clones in-process through libgit2 — no git subprocess, and shallow
+# pack negotiation is noticeably quicker.  GitPython stays the fallback and
+# keeps doing everything after the clone.
+try:
+    import pygit2
+except ImportError:  # pragma: no cover — optional speed-up
+    pygit2 = None
+
+# orjson encodes SSE frames and payloads several times faster than the
+# stdlib; fall back to json where it isn't installed.
+try:
+    import orjson
+except ImportError:  # pragma: no cover — optional speed-up
+    orjson = None
+
+
+def _json_default(obj):
+    """Stdlib fallback for what orjson encodes natively (slots dataclasses)."""
+    if is_dataclass(obj):
+        return asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _dumps(obj) -> str:
+    if orjson:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, default=_json_default)
+
+
+def _dumpb(obj) -> bytes:
+    """_dumps straight to UTF-8 bytes — orjson's native output, no decode."""
+    if orjson:
+        return orjson.dumps(obj)
+    return json.dumps(obj, default=_json_default).encode()
+
+
+def _loads(data: bytes | str):
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
 # Load .env from backend directory so it's found regardless of CWD
 _load_dotenv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
 load_dotenv(dotenv_path=_load_dotenv_path, override=True)
 
-from agent import run_healing_agent, format_branch_name  # noqa: E402
+from agent import GIT_ACTOR, run_healing_agent, format_branch_name, prepare_sandbox_images, staged_blob_changed  # noqa: E402
 from auth import require_auth, github_oauth_start, github_oauth_callback  # noqa: E402
 
 # ---------------------------------------------------------------------------
@@ -39,10 +99,40 @@ from auth import require_auth, github_oauth_start, github_oauth_callback  # noqa
 # ---------------------------------------------------------------------------
 app = Flask(__name__)
 
+
+class _OrjsonProvider(DefaultJSONProvider):
+    """jsonify()/request.get_json() through orjson; Flask's defaults otherwise."""
+
+    def _dumpb(self, obj, indent: bool = False, sort_keys: bool | None = None) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if self.sort_keys if sort_keys is None else sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def dumps(self, obj, **kwargs) -> str:
+        return self._dumpb(obj, bool(kwargs.get("indent")), kwargs.get("sort_keys")).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs) -> Response:
+        # Hand orjson's bytes straight to the response; the base class
+        # round-trips them through a str (decode, f-string, re-encode).
+        obj    = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self._dumpb(obj, indent) + b"\n", mimetype=self.mimetype)
+
+
+if orjson:
+    app.json = _OrjsonProvider(app)
+
 # CORS — allow every origin for local/hackathon use; allow Authorization for JWT.
 # In production, replace "*" with your specific frontend domain(s).
+ALLOWED_ORIGINS: str = os.getenv("ALLOWED_ORIGINS", "*")
 CORS(app, resources={r"/api/*": {
-    "origins": os.getenv("ALLOWED_ORIGINS", "*"),
+    "origins": ALLOWED_ORIGINS,
     "allow_headers": ["Content-Type", "Authorization"],
 }})
 
@@ -55,35 +145,155 @@ logger = logging.getLogger("velo.app")
 
 MAX_RETRIES: int = int(os.getenv("MAX_RETRIES", 5))
 
+# Bot token (fallback when the user has no OAuth token) — read once; .env is
+# loaded above, before this module-level read
+GITHUB_TOKEN: str = os.getenv("GITHUB_TOKEN", "").strip()
+
+# pytest-xdist workers per sandbox test run.  Off (1) by default: xdist
+# changes test isolation — fixtures run per worker, and suites sharing files,
+# ports or ordering fail spuriously, which the agent would then "fix" — and
+# on small suites worker start-up costs more than it saves.  Opt in for
+# large, isolation-safe suites.
+TEST_SHARDS: int = max(1, int(os.getenv("VELO_TEST_SHARDS", 1)))
+
+# The pipeline only needs the current tree to run tests and stack new commits
+# on top of it, so history, other branches and tags are dead weight on the
+# wire. VELO_CLONE_DEPTH keeps more commits when something needs recent
+# history; 0 (or VELO_SHALLOW_CLONE=0) falls back to a full-history clone,
+# which is still blobless: old file contents are only fetched if read.
+CLONE_DEPTH: int = max(0, int(os.getenv("VELO_CLONE_DEPTH", 1))) if os.getenv("VELO_SHALLOW_CLONE", "1") != "0" else 0
+SHALLOW_CLONE: bool = CLONE_DEPTH > 0
+_SHALLOW_CLONE_OPTIONS = [f"--depth={CLONE_DEPTH}", "--single-branch", "--no-tags"]
+# Fetches into an existing checkout keep the same depth (nothing for full clones)
+_FETCH_DEPTH_OPTIONS   = [f"--depth={CLONE_DEPTH}"] if SHALLOW_CLONE else []
+_FULL_CLONE_OPTIONS    = ["--filter=blob:none"]
+# Never block a worker thread on an interactive credential prompt.
+_GIT_ENV = {"GIT_TERMINAL_PROMPT": "0"}
+
+# Scratch root for checkouts.  Clone + test is IO-heavy, so a RAM-backed
+# tmpfs (e.g. VELO_TMP_ROOT=/dev/shm) speeds runs up — but cached checkouts
+# then live in RAM, so it is opt-in, never the default.
+VELO_TMP_ROOT: str = os.getenv("VELO_TMP_ROOT") or tempfile.gettempdir()
+
+# Checkouts are kept between runs under <VELO_CACHE_DIR>/<owner>/<repo> and
+# refreshed with a CLONE_DEPTH fetch, so repeat runs only pull new objects.
+CACHE_DIR: str = os.getenv("VELO_CACHE_DIR", os.path.join(VELO_TMP_ROOT, "velo_cache"))
+# At most this many checkouts are kept; the least recently used are evicted
+# after each run (0 = keep none beyond the run that just finished)
+CACHE_MAX_REPOS: int = max(0, int(os.getenv("VELO_CACHE_MAX_REPOS", 16)))
+
+# Checkouts outlive their run, so keep the cache private to this user
+os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+try:
+    os.chmod(CACHE_DIR, 0o700)
+except OSError as _exc:  # pragma: no cover — e.g. a directory we don't own
+    logger.warning("Could not restrict %s to mode 0700: %s", CACHE_DIR, _exc)
+
+# Build the prebuilt sandbox runner image in the background so the first
+# /api/analyze request doesn't pay for it and server boot is never blocked.
+threading.Thread(target=prepare_sandbox_images, name="velo-image-prep", daemon=True).start()
+
+# owner / repo out of a GitHub HTTPS URL (optional .git suffix / trailing slash)
+_GITHUB_URL_RE   = re.compile(r"https://github\.com/([^/]+)/([^/\s]+?)(?:\.git)?/?$")
+# Characters not allowed in a cache directory name component
+_UNSAFE_PATH_CHARS_RE = re.compile(r"[^\w.-]")
+
+# Padding spaces around the path and the fix text are absorbed by the pattern
+# itself, so the captured groups need no .strip() afterwards.
 _BUG_PATTERN = re.compile(
-    r"\[(\w+)\] error in (.+?) line (\d+) \u2192 Fix: (.+)"
+    r"^\[(\w+)\] error in +(.+?) +line (\d+) \u2192 Fix: *(\S.*)$", re.MULTILINE
 )
 
 
-def _parse_bug_report(line: str) -> dict | None:
-    m = _BUG_PATTERN.match(line.strip())
-    if m:
-        return {
-            "bug_type":        m.group(1),
-            "file":            m.group(2).strip(),
-            "line_number":     int(m.group(3)),
-            "fix_description": m.group(4).strip(),
-        }
-    return None
+@dataclass(slots=True)
+class ParsedBug:
+    """One "[TYPE] error in FILE line N → Fix: ..." report from the agent."""
+    bug_type:        str
+    file:            str
+    line_number:     int
+    fix_description: str
 
 
-def _clone_url_with_token(repo_url: str) -> str:
-    """If GITHUB_TOKEN is set, return a clone URL with auth so Railway/server can clone without prompt."""
-    token = os.getenv("GITHUB_TOKEN", "").strip()
-    if not token or "github.com" not in repo_url:
-        return repo_url
-    return repo_url.replace("https://", f"https://{token}@", 1)
+@dataclass(slots=True)
+class FixRecord:
+    """One row of the dashboard's fixes table; orjson / jsonify encode it as an object."""
+    file:            str
+    bug_type:        str
+    line_number:     int
+    commit_message:  str
+    status:          str
+    fix_description: str
+
+
+def _iter_bug_reports(lines: list[str]) -> Iterator[ParsedBug]:
+    """
+    Yield a ParsedBug for every well-formed bug report line.
+    All lines are scanned in one finditer pass over the joined text instead
+    of one regex call per line; lines that cannot match (no leading "[" or no
+    " line ") are dropped by cheap str checks before the regex ever sees them.
+    """
+    candidates = (line.strip() for line in lines)
+    text = "\n".join(c for c in candidates if c[:1] == "[" and " line " in c)
+    for m in _BUG_PATTERN.finditer(text):
+        yield ParsedBug(m[1], m[2], int(m[3]), m[4])
 
 
 # ---------------------------------------------------------------------------
 # Commit results.json to the healing branch
 # ---------------------------------------------------------------------------
-def _commit_results_json(repo_path: str, formatted_branch: str, payload: dict) -> None:
+# The final push runs off the request path.  The pending push of each
+# checkout is remembered so the next run on it (see _sync_workspace) waits
+# for it before resetting the worktree.
+_PUSH_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="velo-push")
+_pending_pushes: dict[str, Future] = {}
+_pending_pushes_lock = threading.Lock()
+
+
+def _on_results_pushed(branch: str, emit, future: Future) -> None:
+    exc = future.exception()
+    if exc:
+        logger.warning("results.json push to '%s' failed: %s", branch, exc)
+        msg, tag = f"results.json push failed: {exc}", "ERROR"
+    else:
+        logger.info("results.json pushed to '%s'.", branch)
+        msg, tag = f"results.json pushed to {branch}", "INFO"
+    if emit:
+        emit({"type": "log", "tag": tag, "message": msg})
+
+
+def _scrub_remote_token(repo_path: str) -> None:
+    """Drop the credentials from origin's URL so no token persists in the cached checkout."""
+    try:
+        with git.Repo(repo_path) as repo:
+            origin = repo.remote("origin")
+            parts  = urlsplit(origin.url)
+            if parts.username or parts.password:
+                netloc = parts.hostname + (f":{parts.port}" if parts.port else "")
+                origin.set_url(parts._replace(netloc=netloc).geturl())
+    except (ValueError, git.GitError, OSError) as exc:
+        logger.warning("Could not scrub origin URL in %s: %s", repo_path, exc)
+
+
+def _push_and_scrub(repo_path: str, origin, refspec: str):
+    # Scrubbing inside the task (not a done-callback) means a later run that
+    # waits on this future can never race it and lose its own token
+    try:
+        return origin.push(refspec=refspec, set_upstream=True)
+    finally:
+        _scrub_remote_token(repo_path)
+
+
+def _wait_for_pending_push(repo_path: str) -> None:
+    with _pending_pushes_lock:
+        pending = _pending_pushes.pop(os.path.abspath(repo_path), None)
+    if pending is not None:
+        wait([pending])
+
+
+def _commit_results_json(repo_path: str, formatted_branch: str, payload: dict, emit=None) -> Future | None:
+    """Commit results.json and start its push; returns the push future, if any."""
+    repo = None
+    pushing = False
     try:
         repo = git.Repo(repo_path)
         try:
@@ -100,31 +310,51 @@ def _commit_results_json(repo_path: str, formatted_branch: str, payload: dict) -
                 )
                 return
 
+        # Same encode-once, write-then-rename as the agent's own results.json
         results_path = os.path.join(repo_path, "results.json")
-        with open(results_path, "w", encoding="utf-8") as fh:
-            json.dump(payload, fh, indent=2)
+        tmp_path     = results_path + ".tmp"
+        data = (
+            orjson.dumps(payload, option=orjson.OPT_INDENT_2) if orjson
+            else json.dumps(payload, indent=2, default=_json_default).encode("utf-8")
+        )
+        with open(tmp_path, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp_path, results_path)
 
         repo.index.add(["results.json"])
-        if repo.index.diff("HEAD"):
-            author_name  = os.getenv("GIT_AUTHOR_NAME")
-            author_email = os.getenv("GIT_AUTHOR_EMAIL")
-            commit_msg   = "[AI-AGENT] Add results.json — final pipeline report"
-            if author_name and author_email:
-                actor = git.Actor(author_name, author_email)
-                repo.index.commit(commit_msg, author=actor, committer=actor)
+        # Compare the staged blob id with HEAD's — no Diff objects, no subprocess
+        if staged_blob_changed(repo, repo.index, "results.json"):
+            commit_msg = "[AI-AGENT] Add results.json — final pipeline report"
+            if GIT_ACTOR:
+                repo.index.commit(commit_msg, author=GIT_ACTOR, committer=GIT_ACTOR)
             else:
                 repo.index.commit(commit_msg)
 
             origin  = repo.remote(name="origin")
             refspec = f"{formatted_branch}:{formatted_branch}"
-            origin.push(refspec=refspec, set_upstream=True)
-            logger.info("results.json committed and pushed to '%s'.", formatted_branch)
+            future  = _PUSH_POOL.submit(_push_and_scrub, repo_path, origin, refspec)
+            with _pending_pushes_lock:
+                _pending_pushes[os.path.abspath(repo_path)] = future
+            future.add_done_callback(functools.partial(_on_results_pushed, formatted_branch, emit))
+            # The push still needs the handle; release it once that is done
+            future.add_done_callback(lambda _: repo.close())
+            pushing = True
+            logger.info("results.json committed to '%s' — pushing in background.", formatted_branch)
+            if emit:
+                emit({"type": "log", "tag": "INFO", "message": f"Pushing results.json to {formatted_branch}..."})
+            return future
         else:
             logger.info("results.json unchanged — no commit needed.")
 
     except Exception as exc:
         logger.warning("Could not commit results.json: %s", exc)
 
+    finally:
+        # Reap the handle's persistent git cat-file processes
+        if repo is not None and not pushing:
+            repo.close()
+    return None
+
 
 # ---------------------------------------------------------------------------
 # Auth (GitHub OAuth via backend) — no Firebase
@@ -146,72 +376,409 @@ def auth_github_callback():
 def auth_me():
     """Return current user from JWT (Authorization: Bearer <token>)."""
     return jsonify({"user": request.current_user}), 200
-# Auto GitHub PR creation (best-effort, requires GITHUB_TOKEN env var)
+
+
+# ---------------------------------------------------------------------------
+# Clone URL helpers
 # ---------------------------------------------------------------------------
+_GITHUB_HTTPS_PREFIX = "https://github.com/"
+
+
 def _clone_url_with_token(repo_url: str, token: str = "") -> str:
     """Inject GITHUB_TOKEN into a GitHub HTTPS URL for credential-free cloning."""
-    token = token or os.getenv("GITHUB_TOKEN", "").strip()
-    if not token or "github.com" not in repo_url:
+    token = token or GITHUB_TOKEN
+    if not token or not repo_url.startswith(_GITHUB_HTTPS_PREFIX):
         return repo_url
-    return repo_url.replace("https://", f"https://{token}@", 1)
+    return f"https://{token}@github.com/{repo_url[len(_GITHUB_HTTPS_PREFIX):]}"
+
+
+def _pygit2_clone(clone_url: str, dest: str) -> None:
+    """Clone with libgit2, passing any token embedded in the URL as credentials."""
+    callbacks = None
+    token = urlsplit(clone_url).username
+    if token:
+        callbacks = pygit2.RemoteCallbacks(credentials=pygit2.UserPass(token, "x-oauth-basic"))
+    pygit2.clone_repository(clone_url, dest, callbacks=callbacks, depth=CLONE_DEPTH)
+
+
+def _clone_repo(clone_url: str, dest: str) -> git.Repo:
+    """Clone *clone_url* into *dest* — CLONE_DEPTH commits deep, or full history at 0."""
+    # libgit2 has no partial-clone support, so full clones always use the CLI
+    if pygit2 is not None and SHALLOW_CLONE:
+        try:
+            _pygit2_clone(clone_url, dest)
+            return git.Repo(dest)
+        except (pygit2.GitError, ValueError) as exc:
+            logger.warning("pygit2 clone failed (%s) — retrying with git CLI.", exc)
+            shutil.rmtree(dest, ignore_errors=True)
+            os.makedirs(dest, exist_ok=True)
+    options = _SHALLOW_CLONE_OPTIONS if SHALLOW_CLONE else _FULL_CLONE_OPTIONS
+    return git.Repo.clone_from(clone_url, dest, multi_options=options, env=_GIT_ENV)
+
+
+def _init_and_fetch(dest: str, clone_url: str, ref: str) -> git.Repo:
+    """
+    Fetch exactly one commit (SHA or branch name) into an empty repo at *dest*
+    and check it out. Fetching a bare SHA needs uploadpack.allowReachableSHA1InWant
+    on the server (GitHub has it on); callers fall back to _clone_repo otherwise.
+    """
+    repo = git.Repo.init(dest)
+    repo.create_remote("origin", clone_url)
+    repo.git.fetch(*_FETCH_DEPTH_OPTIONS, "--no-tags", "origin", ref, env=_GIT_ENV)
+    repo.git.checkout("FETCH_HEAD")
+    return repo
+
+
+def _checkout_source(clone_url: str, dest: str, ref: str = "") -> git.Repo:
+    """Materialise the target repo in *dest*, pinned to *ref* when one is given."""
+    if not ref:
+        return _clone_repo(clone_url, dest)
+    try:
+        return _init_and_fetch(dest, clone_url, ref)
+    except git.GitCommandError as exc:
+        logger.warning("Single-commit fetch of '%s' failed (%s) — falling back to clone.", ref, exc)
+        shutil.rmtree(os.path.join(dest, ".git"), ignore_errors=True)
+    repo = _clone_repo(clone_url, dest)
+    # Heal the commit that was asked for or nothing: a ref the clone doesn't
+    # have raises GitCommandError, which callers report as a 400
+    try:
+        repo.git.checkout("--detach", ref)
+    except git.GitCommandError:
+        repo.git.checkout("--detach", f"origin/{ref}")
+    return repo
+
+
+def _cache_path(clone_url: str) -> str:
+    """Map a clone URL to its cache directory, ignoring any embedded token."""
+    path = urlsplit(clone_url).path.strip("/")
+    if path.endswith(".git"):
+        path = path[:-4]
+    parts = [_UNSAFE_PATH_CHARS_RE.sub("_", p) for p in path.split("/") if p not in ("", ".", "..")]
+    return os.path.join(CACHE_DIR, *(parts or ["_"]))
+
+
+# Broken checkouts are renamed aside and deleted on this pool, so re-cloning
+# does not wait on rmtree of a whole worktree.  Its workers are joined at
+# interpreter exit, so queued deletions still finish on shutdown.
+_CLEANUP_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="velo-cleanup")
+
+
+def _discard_tree(path: str) -> None:
+    """Remove *path* in the background; it is gone from *path* on return."""
+    trash = f"{path}.stale-{uuid.uuid4().hex[:8]}"
+    try:
+        os.rename(path, trash)
+    except FileNotFoundError:
+        return
+    except OSError:
+        shutil.rmtree(path, ignore_errors=True)
+        return
+    _CLEANUP_POOL.submit(shutil.rmtree, trash, ignore_errors=True)
+
+
+def _lock_file(fh, blocking: bool = True) -> bool:
+    """Take an exclusive lock on the open file fh; False if non-blocking and held."""
+    if fcntl:
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            return False
+        return True
+    fh.seek(0)
+    while True:
+        try:
+            msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            if not blocking:
+                return False
+            time.sleep(0.1)
+
+
+def _unlock_file(fh) -> None:
+    if fcntl:
+        fcntl.flock(fh, fcntl.LOCK_UN)
+    else:
+        fh.seek(0)
+        msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _cached_checkouts() -> list[str]:
+    """Every checkout under CACHE_DIR (a directory with a sibling .lock file)."""
+    found = []
+    for root, dirs, files in os.walk(CACHE_DIR):
+        locks = {f[:-5] for f in files if f.endswith(".lock")}
+        found.extend(os.path.join(root, d) for d in dirs if d in locks)
+        # Never descend into a checkout, or into one being deleted
+        dirs[:] = [d for d in dirs if d not in locks and ".stale-" not in d]
+    return found
+
+
+def _evict_cached_checkouts(keep: int = CACHE_MAX_REPOS) -> None:
+    """
+    Delete all but the *keep* most recently used checkouts.  Recency is the
+    lockfile's mtime (touched whenever a run takes the lock).  A checkout
+    that is locked by a run or still has a results.json push in flight is
+    skipped; lockfiles themselves stay, as waiters may hold them open.
+    """
+    def last_used(path: str) -> float:
+        try:
+            return os.stat(path + ".lock").st_mtime
+        except OSError:
+            return 0.0
+
+    checkouts = sorted(_cached_checkouts(), key=last_used, reverse=True)
+    for work_dir in checkouts[keep:]:
+        with _pending_pushes_lock:
+            push = _pending_pushes.get(os.path.abspath(work_dir))
+        if push is not None and not push.done():
+            continue
+        try:
+            with open(work_dir + ".lock", "a") as lock_fh:
+                if not _lock_file(lock_fh, blocking=False):
+                    continue  # In use by a run right now
+                try:
+                    logger.info("Evicting cached checkout %s", work_dir)
+                    _discard_tree(work_dir)
+                finally:
+                    _unlock_file(lock_fh)
+        except OSError as exc:
+            logger.warning("Could not evict cached checkout %s: %s", work_dir, exc)
+
+
+@contextmanager
+def _repo_workspace(clone_url: str):
+    """
+    Yield the cache directory for *clone_url*, holding an exclusive lock on a
+    sibling lockfile for the whole run — the pipeline branches, commits and
+    pushes in this worktree, so concurrent runs on one repo are serialised.
+    Once the lock is released, the cache is trimmed to CACHE_MAX_REPOS.
+    """
+    work_dir = _cache_path(clone_url)
+    os.makedirs(work_dir, exist_ok=True)
+    with open(work_dir + ".lock", "w") as lock_fh:
+        _lock_file(lock_fh)
+        os.utime(work_dir + ".lock")  # Mark as most recently used
+        try:
+            yield work_dir
+        finally:
+            # A results.json push still in flight scrubs once it is done
+            with _pending_pushes_lock:
+                push = _pending_pushes.get(os.path.abspath(work_dir))
+            if (push is None or push.done()) and os.path.isdir(os.path.join(work_dir, ".git")):
+                _scrub_remote_token(work_dir)
+            _unlock_file(lock_fh)
+    _evict_cached_checkouts()
+
+
+def _refresh_cached_checkout(work_dir: str, clone_url: str, ref: str = "") -> git.Repo:
+    """
+    Bring an existing cached checkout to the tip of *ref* (default: the
+    remote's HEAD) and wipe everything a previous run left behind — local
+    healing branches, untracked and ignored files.
+    """
+    repo = git.Repo(work_dir)
+    repo.remote("origin").set_url(clone_url)  # token may differ between users
+    repo.git.fetch(*_FETCH_DEPTH_OPTIONS, "--prune", "--no-tags", "origin", ref or "HEAD", env=_GIT_ENV)
+    repo.git.checkout("--force", "--detach", "FETCH_HEAD")
+    repo.git.clean("-fdx")
+    stale = [head.name for head in repo.heads]
+    if stale:
+        repo.git.branch("-D", *stale)
+    return repo
+
+
+def _sync_workspace(work_dir: str, clone_url: str, ref: str = "") -> git.Repo:
+    """Refresh the cached checkout in *work_dir*, or clone it on first use."""
+    # A previous run's results.json push may still be reading this checkout
+    _wait_for_pending_push(work_dir)
+    if os.path.isdir(os.path.join(work_dir, ".git")):
+        try:
+            return _refresh_cached_checkout(work_dir, clone_url, ref)
+        except (git.GitCommandError, git.InvalidGitRepositoryError, ValueError) as exc:
+            logger.warning("Cached checkout at %s unusable (%s) — re-cloning.", work_dir, exc)
+    _discard_tree(work_dir)
+    os.makedirs(work_dir, exist_ok=True)
+    return _checkout_source(clone_url, work_dir, ref)
 
 
 # ---------------------------------------------------------------------------
 # GitHub identity helpers
 # ---------------------------------------------------------------------------
+GITHUB_API = "https://api.github.com"
+
+
+def _parse_github_repo(url: str) -> tuple[str, str] | None:
+    """(owner, repo) of a GitHub HTTPS repo URL, or None if it isn't one."""
+    m = _GITHUB_URL_RE.match(url.strip())
+    return (m[1], m[2]) if m else None
+
+
+# One pooled keep-alive session for every GitHub API call, so the owner
+# lookup, fork, permission check and PR creation of a run (and later runs)
+# reuse a warm TLS connection instead of handshaking per call.
+_github = requests.Session()
+_github.headers.update({
+    "Accept":     "application/vnd.github+json",
+    "User-Agent": "Velo-Agent/1.0",
+})
+# urllib3 keeps at most pool_maxsize idle connections per host and discards
+# the rest (default 10); leave room for every pipeline worker plus the
+# background lookups, so concurrent runs don't re-handshake.
+_github.mount("https://", requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=20))
+
+
+# Fork readiness polling: exponential backoff with jitter, capped per wait
+FORK_READY_MAX_POLLS   = 8
+FORK_POLL_BASE_SECONDS = 0.5
+FORK_POLL_CAP_SECONDS  = 8.0
+FORK_POLL_JITTER       = 0.5
+
+
+def _auth_header(token: str) -> dict:
+    return {"Authorization": f"token {token}"}
+
+
+def _backoff_delay(attempt: int, base: float, cap: float, jitter: float) -> float:
+    """min(cap, base * 2**attempt), stretched by up to `jitter` (a fraction) at random."""
+    return min(cap, base * 2 ** attempt) * (1 + random.uniform(0, jitter))
+
+
+# Transient GitHub failures (rate limiting, 5xx, dropped connections) are
+# retried with backoff; a Retry-After / rate-limit reset longer than
+# GITHUB_RETRY_MAX_WAIT_SECONDS is not waited out — the call fails instead.
+GITHUB_RETRY_STATUSES         = frozenset({429, 500, 502, 503, 504})
+GITHUB_MAX_RETRIES            = 4
+GITHUB_RETRY_BASE_SECONDS     = 1.0
+GITHUB_RETRY_CAP_SECONDS      = 30.0
+GITHUB_RETRY_JITTER           = 0.5
+GITHUB_RETRY_MAX_WAIT_SECONDS = 60.0
+
+
+def _server_wait_hint(r: requests.Response) -> float | None:
+    """Seconds GitHub asked us to wait (Retry-After, or an exhausted rate-limit window)."""
+    retry_after = r.headers.get("Retry-After")
+    if retry_after:
+        if retry_after.isdigit():
+            return float(retry_after)
+        try:
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+    if r.headers.get("X-RateLimit-Remaining") == "0" and r.headers.get("X-RateLimit-Reset", "").isdigit():
+        return max(0.0, int(r.headers["X-RateLimit-Reset"]) - time.time())
+    return None
+
+
+def _gh_request(method: str, url: str, token: str, **kwargs) -> requests.Response:
+    """
+    One GitHub API call through the shared session, retried on 429 / 5xx /
+    rate-limit 403s and connection errors.  Anything else (401, 404, 422 …) is
+    returned at once for the caller's raise_for_status().
+    """
+    kwargs["headers"] = {**_auth_header(token), **kwargs.get("headers", {})}
+    for attempt in range(GITHUB_MAX_RETRIES + 1):
+        last_try = attempt == GITHUB_MAX_RETRIES
+        try:
+            r = _github.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            if last_try:
+                raise
+            logger.warning("GitHub %s %s failed (%s) — retrying.", method, url, exc)
+            time.sleep(_backoff_delay(attempt, GITHUB_RETRY_BASE_SECONDS, GITHUB_RETRY_CAP_SECONDS, GITHUB_RETRY_JITTER))
+            continue
+
+        hint = _server_wait_hint(r)
+        rate_limited = r.status_code == 403 and hint is not None
+        if last_try or not (r.status_code in GITHUB_RETRY_STATUSES or rate_limited):
+            return r
+        delay = _backoff_delay(attempt, GITHUB_RETRY_BASE_SECONDS, GITHUB_RETRY_CAP_SECONDS, GITHUB_RETRY_JITTER)
+        if hint is not None:
+            if hint > GITHUB_RETRY_MAX_WAIT_SECONDS:
+                return r
+            delay = max(delay, hint)
+        logger.warning("GitHub %s %s → %d — retrying in %.1fs.", method, url, r.status_code, delay)
+        time.sleep(delay)
+    return r
+
+
+def _wait_for_fork(fork_full_name: str, branch: str, token: str) -> bool:
+    """
+    Poll until the new fork's default branch is readable, backing off
+    exponentially — returns as soon as GitHub has finished initialising it.
+    """
+    url = f"{GITHUB_API}/repos/{fork_full_name}/branches/{branch}"
+    for attempt in range(FORK_READY_MAX_POLLS):
+        try:
+            r = _github.get(url, headers=_auth_header(token), timeout=10)
+            if r.status_code == 200:
+                return True
+        except requests.RequestException as exc:
+            logger.debug("Fork readiness poll failed: %s", exc)
+        time.sleep(_backoff_delay(attempt, FORK_POLL_BASE_SECONDS, FORK_POLL_CAP_SECONDS, FORK_POLL_JITTER))
+    return False
+
+
+# A token's owner is fixed for the token's lifetime; the TTL only bounds how
+# long a revoked token keeps resolving.  Failures are never cached.
+TOKEN_OWNER_TTL_SECONDS = 3600
+_token_owners: dict[str, tuple[str, float]] = {}
+_token_owners_lock = threading.Lock()
+
+
 def _get_token_owner(token: str) -> str | None:
     """Return the GitHub login (username) for the given token, or None on failure."""
+    with _token_owners_lock:
+        cached = _token_owners.get(token)
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
     try:
-        req = urlreq.Request(
-            "https://api.github.com/user",
-            headers={
-                "Authorization": f"token {token}",
-                "Accept":        "application/vnd.github+json",
-                "User-Agent":    "Velo-Agent/1.0",
-            },
-        )
-        with urlreq.urlopen(req, timeout=10) as r:
-            return json.loads(r.read().decode()).get("login")
+        r = _gh_request("GET", f"{GITHUB_API}/user", token, timeout=10)
+        r.raise_for_status()
+        login = _loads(r.content).get("login")
     except Exception as exc:
         logger.warning("Could not resolve token owner: %s", exc)
         return None
+    if login:
+        with _token_owners_lock:
+            _token_owners[token] = (login, time.monotonic() + TOKEN_OWNER_TTL_SECONDS)
+    return login
 
 
 def _fork_repo(repo_url: str, token: str) -> str | None:
     """
     Fork repo_url into the token owner's account via the GitHub API.
     Returns an authenticated clone URL for the new fork, or None on failure.
-    Waits up to ~12 s for GitHub to initialise the fork before returning.
+    Waits (polling with backoff) until GitHub has initialised the fork.
     """
-    m = re.match(r"https://github\.com/([^/]+)/([^/\s]+?)(?:\.git)?/?$", repo_url.strip())
-    if not m:
+    parsed = _parse_github_repo(repo_url)
+    if not parsed:
         return None
-    owner, repo = m.group(1), m.group(2)
+    owner, repo = parsed
 
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept":        "application/vnd.github+json",
-        "Content-Type":  "application/json",
-        "User-Agent":    "Velo-Agent/1.0",
-    }
     try:
-        req = urlreq.Request(
-            f"https://api.github.com/repos/{owner}/{repo}/forks",
+        r = _gh_request(
+            "POST",
+            f"{GITHUB_API}/repos/{owner}/{repo}/forks",
+            token,
             data=b"{}",
-            headers=headers,
-            method="POST",
+            headers={"Content-Type": "application/json"},
+            timeout=20,
         )
-        with urlreq.urlopen(req, timeout=20) as r:
-            fork_data = json.loads(r.read().decode())
+        r.raise_for_status()
+        fork_data = _loads(r.content)
 
         fork_full_name = fork_data.get("full_name")
         if not fork_full_name:
             logger.warning("Fork API returned no full_name.")
             return None
 
-        # GitHub takes a few seconds to initialise the fork
-        time.sleep(12)
-        logger.info("Fork ready: %s", fork_full_name)
+        # GitHub initialises the fork asynchronously — usually in a second or
+        # two, occasionally much longer for big repos
+        if _wait_for_fork(fork_full_name, fork_data.get("default_branch") or "main", token):
+            logger.info("Fork ready: %s", fork_full_name)
+        else:
+            logger.warning("Fork %s not reported ready yet — cloning anyway.", fork_full_name)
         return f"https://{token}@github.com/{fork_full_name}.git"
 
     except Exception as exc:
@@ -224,33 +791,71 @@ def _has_push_access(repo_url: str, token: str) -> bool:
     if not token:
         return False
     
-    m = re.match(r"https://github\.com/([^/]+)/([^/\s]+?)(?:\.git)?/?$", repo_url.strip())
-    if not m:
+    parsed = _parse_github_repo(repo_url)
+    if not parsed:
         return False
-    owner, repo = m.group(1), m.group(2)
+    owner, repo = parsed
 
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept":        "application/vnd.github+json",
-        "User-Agent":    "Velo-Agent/1.0",
-    }
-    
     try:
-        req = urlreq.Request(
-            f"https://api.github.com/repos/{owner}/{repo}",
-            headers=headers,
-        )
-        with urlreq.urlopen(req, timeout=10) as r:
-            data = json.loads(r.read().decode())
-            perms = data.get("permissions", {})
-            can_push = perms.get("push", False) or perms.get("admin", False)
-            logger.info(f"[_has_push_access] Checked {owner}/{repo}: push={perms.get('push')}, admin={perms.get('admin')} -> {can_push}")
-            return can_push
+        r = _gh_request("GET", f"{GITHUB_API}/repos/{owner}/{repo}", token, timeout=10)
+        r.raise_for_status()
+        data = _loads(r.content)
+        # Same endpoint the PR step reads its base from — keep the answer
+        if data.get("default_branch"):
+            _remember_default_branch(owner, repo, token, data["default_branch"])
+        perms = data.get("permissions", {})
+        can_push = perms.get("push", False) or perms.get("admin", False)
+        logger.info(f"[_has_push_access] Checked {owner}/{repo}: push={perms.get('push')}, admin={perms.get('admin')} -> {can_push}")
+        return can_push
     except Exception as exc:
         logger.warning("Could not check push permissions: %s", exc)
         return False
 
 
+# Default branch per (owner, repo, token), LRU-bounded.  It practically never
+# changes, so repeat PRs skip the API call; the token is part of the key so a
+# rotated token never reuses another token's answer.  Failures aren't cached.
+_DEFAULT_BRANCH_CACHE_SIZE = 512
+_default_branches: "OrderedDict[tuple[str, str, str], str]" = OrderedDict()
+_default_branches_lock = threading.Lock()
+
+
+def _remember_default_branch(owner: str, repo: str, token: str, branch: str) -> None:
+    with _default_branches_lock:
+        _default_branches[(owner, repo, token)] = branch
+        _default_branches.move_to_end((owner, repo, token))
+        if len(_default_branches) > _DEFAULT_BRANCH_CACHE_SIZE:
+            _default_branches.popitem(last=False)
+
+
+def _get_default_branch(owner: str, repo: str, token: str) -> str:
+    """Default branch of owner/repo (cached — see above).  Raises on failure."""
+    with _default_branches_lock:
+        cached = _default_branches.get((owner, repo, token))
+    if cached is not None:
+        return cached
+    r = _gh_request("GET", f"{GITHUB_API}/repos/{owner}/{repo}", token, timeout=10)
+    r.raise_for_status()
+    branch = _loads(r.content)["default_branch"]
+    _remember_default_branch(owner, repo, token, branch)
+    return branch
+
+
+# Small pool for GitHub lookups started ahead of the step that needs them
+_GITHUB_LOOKUP_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="velo-gh")
+
+
+def _prefetch_default_branch(repo_url: str, token: str) -> Future | None:
+    """
+    Start resolving repo_url's default branch in the background so the PR
+    step does not wait on it.  None when there is nothing to look up.
+    """
+    parsed = _parse_github_repo(repo_url)
+    if not token or not parsed:
+        return None
+    return _GITHUB_LOOKUP_POOL.submit(_get_default_branch, *parsed, token)
+
+
 def _resolve_clone_url(repo_url: str, emit=None, user_token: str = None) -> tuple[str, str | None]:
     """
     Decide whether to clone the original repo or fork it first.
@@ -271,7 +876,7 @@ def _resolve_clone_url(repo_url: str, emit=None, user_token: str = None) -> tupl
 
     # PRIORITIZE: User's OAuth token (if provided via auth) over system env var
     # This allows authenticated users to push to their own repos without system config.
-    system_token = os.getenv("GITHUB_TOKEN", "").strip()
+    system_token = GITHUB_TOKEN
     
     # Check if a user-specific token was passed (e.g. from JWT)
     # We'll need to update the signature of _resolve_clone_url to accept an optional token override
@@ -280,23 +885,24 @@ def _resolve_clone_url(repo_url: str, emit=None, user_token: str = None) -> tupl
         _log("No GITHUB_TOKEN set — cloning without auth (push will be skipped).")
         return repo_url, None
 
-    m = re.match(r"https://github\.com/([^/]+)/", repo_url)
-    repo_owner = m.group(1) if m else None
+    parsed = _parse_github_repo(repo_url)
+    repo_owner = parsed[0] if parsed else None
 
     token_owner = _get_token_owner(token)
     if not token_owner:
         _log("Could not resolve token owner — cloning with token (best-effort).")
         return _clone_url_with_token(repo_url, token), None
 
+    # Own repo: pushable by definition, no permissions probe needed
+    if repo_owner and token_owner.lower() == repo_owner.lower():
+        _log(f"Repo belongs to token owner ({token_owner}) — cloning directly.")
+        return _clone_url_with_token(repo_url, token), None
+
     # Check for direct push access (Collaborator or Owner)
     if _has_push_access(repo_url, token):
         _log(f"Token has push access to {repo_url} — cloning directly.")
         return _clone_url_with_token(repo_url, token), None
 
-    if repo_owner and token_owner.lower() == repo_owner.lower():
-        _log(f"Repo belongs to token owner ({token_owner}) — cloning directly.")
-        return _clone_url_with_token(repo_url, token), None
-
     # Different owner → fork first
     _log(f"Repo owned by '{repo_owner}' — forking to '{token_owner}' for push access...")
     fork_url = _fork_repo(repo_url, token)
@@ -314,10 +920,11 @@ def _resolve_clone_url(repo_url: str, emit=None, user_token: str = None) -> tupl
 def _create_github_pr(
     repo_url: str,
     branch_name: str,
-    all_fixes: list,
+    all_fixes: list[FixRecord],
     head_repo_owner: str | None = None,
     user_token: str = None,
     emit=None,
+    base_branch: Future | None = None,
 ) -> str | None:
     """
     Create a PR on the *original* repo.
@@ -325,39 +932,41 @@ def _create_github_pr(
     head_repo_owner: when the branch was pushed to a fork, pass the fork
     owner's login so GitHub can find the branch (head = "fork_owner:branch").
     Leave None when the branch was pushed directly to the original repo.
+    base_branch: a _prefetch_default_branch future, if one was started.
     """
-    token = user_token or os.getenv("GITHUB_TOKEN", "").strip()
+    token = user_token or GITHUB_TOKEN
     if not token:
         logger.warning("[_create_github_pr] No token found (user or system) — aborting PR.")
         if emit: emit({"type": "log", "tag": "WARN", "message": "PR skipped: No valid GitHub token found."})
         return None
 
     # Parse owner/repo
-    m = re.match(r"https://github\.com/([^/]+)/([^/\s]+?)(?:\.git)?/?$", repo_url.strip())
-    if not m:
+    parsed = _parse_github_repo(repo_url)
+    if not parsed:
         logger.warning(f"[_create_github_pr] Could not parse repo URL: {repo_url}")
         if emit: emit({"type": "error", "message": f"PR failed: Could not parse repo URL '{repo_url}'"})
         return None
-    owner, repo = m.group(1), m.group(2)
+    owner, repo = parsed
 
-    base = "main"  # TODO: detect default branch dynamically?
+    try:
+        base = base_branch.result() if base_branch else _get_default_branch(owner, repo, token)
+    except Exception as exc:
+        logger.warning(f"[_create_github_pr] Could not read default branch ({exc}) — assuming 'main'")
+        base = "main"
     head = f"{head_repo_owner}:{branch_name}" if head_repo_owner else branch_name
 
     logger.info(f"[_create_github_pr] Attempting PR: {head} -> {base} on {owner}/{repo}")
 
-    title = f"Fix: {all_fixes[0]['fix_description']}" if len(all_fixes) == 1 else f"Fix {len(all_fixes)} issues found by Velo"
-    body  = "## Velo Autonomous Fixes\\n\\n"
-    for fix in all_fixes:
-        body += f"- **{fix.get('bug_type', 'BUG')}** in `{fix['file']}`: {fix.get('fix_description', 'No description')}\\n"
-    
-    body += "\\n\\n*Generated by [Velo Workspace Agent](https://github.com/oyelurker/velo-agent)*"
+    title = f"Fix: {all_fixes[0].fix_description}" if len(all_fixes) == 1 else f"Fix {len(all_fixes)} issues found by Velo"
+    fix_lines = [f"- **{fix.bug_type}** in `{fix.file}`: {fix.fix_description}" for fix in all_fixes]
+    body = "\n".join([
+        "## Velo Autonomous Fixes",
+        "",
+        *fix_lines,
+        "",
+        "*Generated by [Velo Workspace Agent](https://github.com/oyelurker/velo-agent)*",
+    ])
 
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept":        "application/vnd.github+json",
-        "User-Agent":    "Velo-Agent/1.0",
-    }
-    
     payload = {
         "title": title,
         "body":  body,
@@ -367,27 +976,28 @@ def _create_github_pr(
     }
 
     try:
-        req = urlreq.Request(
-            f"https://api.github.com/repos/{owner}/{repo}/pulls",
-            data=json.dumps(payload).encode(),
-            headers=headers,
-            method="POST",
+        r = _gh_request(
+            "POST",
+            f"{GITHUB_API}/repos/{owner}/{repo}/pulls",
+            token,
+            data=_dumpb(payload),
+            headers={"Content-Type": "application/json"},
+            timeout=15,
         )
-        with urlreq.urlopen(req, timeout=15) as r:
-            data = json.loads(r.read().decode())
-            html_url = data.get("html_url")
-            logger.info(f"[_create_github_pr] Success: {html_url}")
-            return html_url
+        r.raise_for_status()
+        data = _loads(r.content)
+        html_url = data.get("html_url")
+        logger.info(f"[_create_github_pr] Success: {html_url}")
+        return html_url
 
     except Exception as exc:
         err_msg = str(exc)
-        # If it failed, maybe because PR already exists? Check HTTPError for details
-        if hasattr(exc, "read"):
-            try:
-                err_body = exc.read().decode()
-                logger.warning(f"[_create_github_pr] API Error Body: {err_body}")
-                err_msg = f"{exc} — {err_body}"
-            except: pass
+        # If it failed, maybe because PR already exists? Check the response body for details
+        response = getattr(exc, "response", None)
+        if response is not None:
+            err_body = response.text
+            logger.warning(f"[_create_github_pr] API Error Body: {err_body}")
+            err_msg = f"{exc} — {err_body}"
             
         logger.warning(f"[_create_github_pr] POST failed: {exc}")
         if emit: emit({"type": "error", "message": f"GitHub PR creation failed: {err_msg}"})
@@ -401,15 +1011,17 @@ def _run_healing_loop(
     repo_url: str,
     team_name: str,
     leader_name: str,
-    tmp_dir: str,
+    repo_path: str,
 
     emit=None,
     fork_owner: str | None = None,
     user_token: str = None,
+    pushes: list[Future] | None = None,
 ) -> dict:
     """
     Runs the full continuous healing loop via the agent and returns shaped response dict.
     `emit` is an optional callable(event_dict) for SSE streaming.
+    The background results.json push, if one starts, is appended to `pushes`.
     """
     raw_branch_name  = f"{team_name} {leader_name}"
     formatted_branch = format_branch_name(raw_branch_name)
@@ -418,30 +1030,37 @@ def _run_healing_loop(
         if emit:
             emit({"type": "log", "tag": tag, "message": msg})
 
+    # A PR is only opened from a fork; look its base up while the agent runs
+    base_branch = _prefetch_default_branch(repo_url, user_token or GITHUB_TOKEN) if fork_owner else None
+
     # The agent runs its own iteration loop internally up to MAX_RETRIES
     results = run_healing_agent(
-        repo_path=tmp_dir,
+        repo_path=repo_path,
         raw_branch_name=raw_branch_name,
         emit=emit,
         max_retries=MAX_RETRIES,
+        parallel_shards=TEST_SHARDS,
     )
 
     # 1. Shape the detailed bug reports into objects for the frontend
-    all_fixes = []
-    seen_bug_lines = set()
-
-    for br in results.get("bug_reports", []):
-        parsed = _parse_bug_report(br)
-        if parsed and br not in seen_bug_lines:
-            seen_bug_lines.add(br)
-            all_fixes.append({
-                "file":           parsed["file"],
-                "bug_type":       parsed["bug_type"],
-                "line_number":    parsed["line_number"],
-                "commit_message": f"[AI-AGENT] Fix: {parsed['fix_description']}",
-                "status":         "fixed" if parsed["file"] in results.get("files_fixed", []) else "failed",
-                "fix_description": parsed["fix_description"],
-            })
+    all_fixes: list[FixRecord] = []
+    files_fixed = set(results.get("files_fixed", []))
+    # Dedup on the parsed fields rather than the raw line, so the same bug
+    # reported with different spacing across iterations is listed once.
+    seen_bugs: set[tuple[str, str, int, str]] = set()
+
+    for parsed in _iter_bug_reports(results.get("bug_reports", [])):
+        key = (parsed.bug_type, parsed.file, parsed.line_number, " ".join(parsed.fix_description.split()))
+        if key not in seen_bugs:
+            seen_bugs.add(key)
+            all_fixes.append(FixRecord(
+                file=parsed.file,
+                bug_type=parsed.bug_type,
+                line_number=parsed.line_number,
+                commit_message=f"[AI-AGENT] Fix: {parsed.fix_description}",
+                status="fixed" if parsed.file in files_fixed else "failed",
+                fix_description=parsed.fix_description,
+            ))
 
     # The timeline returned from agent: {iteration, status, timestamp, failures_in_run, fixes_in_run}
     timeline = results.get("ci_timeline", [])
@@ -450,14 +1069,19 @@ def _run_healing_loop(
     # We pass the full agent payload so it's transparent, augmenting it with frontend expected keys if we want,
     # but the agent already writes a great generic results.json! Let's just save and push it with formatting.
     results["fixes"] = all_fixes  # Attach the parsed fixes to the repo's results.json
-    _commit_results_json(tmp_dir, formatted_branch, results)
+    push = _commit_results_json(repo_path, formatted_branch, results, emit=emit)
+    if push is not None and pushes is not None:
+        pushes.append(push)
 
     # 3. Auto-create GitHub PR (ONLY if forked)
     pr_url = None
     if all_fixes:
         if fork_owner:
             _e("INFO", "Creating GitHub Pull Request...")
-            pr_url = _create_github_pr(repo_url, formatted_branch, all_fixes, head_repo_owner=fork_owner, user_token=user_token, emit=emit)
+            pr_url = _create_github_pr(
+                repo_url, formatted_branch, all_fixes,
+                head_repo_owner=fork_owner, user_token=user_token, emit=emit, base_branch=base_branch,
+            )
             if pr_url:
                 _e("INFO", f"PR created → {pr_url}")
         else:
@@ -491,6 +1115,80 @@ def _run_healing_loop(
     }
 
 
+# ---------------------------------------------------------------------------
+# Background runs — pipelines execute on a bounded pool, not request threads
+# ---------------------------------------------------------------------------
+# Caps how many clone → heal → push pipelines run at once per process; extra
+# runs queue instead of each spawning an unbounded thread.
+MAX_CONCURRENT_RUNS: int = int(os.getenv("VELO_MAX_CONCURRENT_RUNS", 4))
+# Finished async jobs are kept this long for GET /api/analyze/jobs/<id>
+JOB_TTL_SECONDS = 3600
+
+_PIPELINE_POOL = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_RUNS, thread_name_prefix="velo-run")
+_runs_in_flight = 0
+_runs_lock = threading.Lock()
+
+_jobs: dict[str, dict] = {}
+_jobs_lock = threading.Lock()
+
+
+def _submit_run(fn, *args, **kwargs) -> tuple[Future, bool]:
+    """
+    Queue fn(*args, **kwargs) on the pipeline pool.  Returns the future and
+    whether every worker was already busy (i.e. the run has to wait).
+    """
+    global _runs_in_flight
+    with _runs_lock:
+        queued = _runs_in_flight >= MAX_CONCURRENT_RUNS
+        _runs_in_flight += 1
+
+    def run():
+        global _runs_in_flight
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with _runs_lock:
+                _runs_in_flight -= 1
+
+    return _PIPELINE_POOL.submit(run), queued
+
+
+def _expire_jobs() -> None:
+    """Drop finished jobs older than JOB_TTL_SECONDS.  Caller holds _jobs_lock."""
+    cutoff = time.time() - JOB_TTL_SECONDS
+    for job_id in [j for j, rec in _jobs.items() if rec.get("finished", cutoff + 1) < cutoff]:
+        del _jobs[job_id]
+
+
+def _submit_job(owner: str | None, fn, *args, **kwargs) -> str:
+    """
+    Run a (body, http_status)-returning pipeline as a pollable job; returns
+    its id.  fn is called with emit=, and every event it emits is kept on the
+    job so pollers can follow progress while it runs.  Only *owner* (the
+    submitting user's id) may poll it.
+    """
+    job_id = uuid.uuid4().hex
+    record = {"status": "queued", "created": time.time(), "events": [], "owner": owner}
+    with _jobs_lock:
+        _expire_jobs()
+        _jobs[job_id] = record
+
+    def run():
+        record["status"] = "running"
+        try:
+            record["result"], record["http_status"] = fn(*args, emit=record["events"].append, **kwargs)
+            record["status"] = "done"
+        except Exception as exc:
+            logger.exception("Job %s failed.", job_id)
+            record["result"], record["http_status"] = {"error": str(exc), "status": "FATAL_ERROR"}, 500
+            record["status"] = "failed"
+        finally:
+            record["finished"] = time.time()
+
+    _submit_run(run)
+    return job_id
+
+
 # ---------------------------------------------------------------------------
 # Health check
 # ---------------------------------------------------------------------------
@@ -517,23 +1215,31 @@ def analyze():
     │ {                                                         │
     │   "repo_url":    "https://github.com/org/repo",          │
     │   "team_name":   "Vakratund",                            │
-    │   "leader_name": "Tejas Kumar Punyap"                    │
+    │   "leader_name": "Tejas Kumar Punyap",                   │
+    │   "commit_sha":  "<optional SHA to heal>",               │
+    │   "ref":         "<optional branch, if no commit_sha>",  │
+    │   "async":       false                                   │
     │ }                                                         │
     └───────────────────────────────────────────────────────────┘
 
     Flow:
       1. Validate input fields.
-      2. Clone the GitHub repo into a secure temp directory.
+      2. Clone the GitHub repo into its cache directory (or refresh the cached
+         checkout with a shallow fetch and clean it).
       3. Build the branch name: format_branch_name("{team_name} {leader_name}")
          → VAKRATUND_TEJAS_KUMAR_PUNYAP_AI_Fix
       4. Run the healing agent in a retry loop (up to MAX_RETRIES iterations).
          Each iteration: sandbox_tester → llm_solver → gitops
          Stop early when tests pass or no more bugs are found.
       5. Shape the aggregated results into the React dashboard format.
-      6. Clean up temp directory unconditionally.
+      6. Release the per-repo cache lock unconditionally.
+
+    With "async": true the run is queued and the call returns at once with
+    202 {"job_id", "status_url"}; poll GET /api/analyze/jobs/<job_id>.
 
     Returns:
         200 — all tests passing after healing
+        202 — async job accepted
         207 — partial success (fixes applied but tests still failing)
         400 — bad request (missing / invalid fields, clone failure)
         500 — unhandled internal error
@@ -551,67 +1257,182 @@ def analyze():
     if not team_name:   return jsonify({"error": "Missing required field: team_name"}),   400
     if not leader_name: return jsonify({"error": "Missing required field: leader_name"}), 400
 
+    source_ref  = (data.get("commit_sha") or data.get("ref") or "").strip()
+
     formatted_branch = format_branch_name(f"{team_name} {leader_name}")
     logger.info("Batch analysis — repo=%s  branch=%s", repo_url, formatted_branch)
 
-    tmp_dir = None
+    # Extract GitHub access token from authenticated user (if available)
+    user_token = request.current_user.get("access_token") if hasattr(request, "current_user") else None
+
+    if data.get("async"):
+        job_id = _submit_job(request.current_user["id"], _run_batch_pipeline, repo_url, team_name, leader_name, source_ref, user_token)
+        return jsonify({"job_id": job_id, "status": "queued", "status_url": f"/api/analyze/jobs/{job_id}"}), 202
+
+    # Synchronous mode still executes on the pipeline pool, so the process-wide
+    # concurrency cap holds; this request thread just waits for the result.
+    future, _ = _submit_run(_run_batch_pipeline, repo_url, team_name, leader_name, source_ref, user_token)
+    body, http_status = future.result()
+    return jsonify(body), http_status
+
+
+def _run_batch_pipeline(
+    repo_url: str,
+    team_name: str,
+    leader_name: str,
+    source_ref: str,
+    user_token: str | None,
+    emit=None,
+) -> tuple[dict, int]:
+    """Clone + heal for /api/analyze; returns (response body, HTTP status)."""
     try:
-        tmp_dir = tempfile.mkdtemp(prefix="velo_")
-        
-        # Extract GitHub access token from authenticated user (if available)
-        user_token = request.current_user.get("access_token") if hasattr(request, "current_user") else None
-        
-        clone_url, fork_owner = _resolve_clone_url(repo_url, user_token=user_token)
-        try:
-            git.Repo.clone_from(clone_url, tmp_dir)
-        except git.GitCommandError as exc:
-            return jsonify({"error": f"Failed to clone repository: {exc}"}), 400
+        clone_url, fork_owner = _resolve_clone_url(repo_url, emit=emit, user_token=user_token)
+        with _repo_workspace(clone_url) as work_dir:
+            try:
+                _sync_workspace(work_dir, clone_url, source_ref)
+            except git.GitCommandError as exc:
+                return {"error": f"Failed to clone repository: {exc}"}, 400
 
-        response = _run_healing_loop(repo_url, team_name, leader_name, tmp_dir, fork_owner=fork_owner, user_token=user_token)
+            response = _run_healing_loop(
+                repo_url, team_name, leader_name, work_dir, emit=emit, fork_owner=fork_owner, user_token=user_token,
+            )
         http_status = 200 if response["ci_status"] == "PASSED" else 207
-        return jsonify(response), http_status
+        return response, http_status
 
     except Exception as exc:
         logger.exception("Unhandled error during healing pipeline.")
-        return jsonify({"error": str(exc), "status": "FATAL_ERROR"}), 500
+        return {"error": str(exc), "status": "FATAL_ERROR"}, 500
 
-    finally:
-        if tmp_dir and os.path.exists(tmp_dir):
-            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+@app.route("/api/analyze/jobs/<job_id>", methods=["GET"])
+@require_auth
+def analyze_job(job_id: str):
+    """
+    Poll a job started with {"async": true}.  While queued / running:
+    {"job_id", "status", "events", "next"}; once finished the pipeline's
+    response is included as "result" along with the status code
+    /api/analyze would have returned.
+
+    "events" are the same log / progress events the SSE stream carries.
+    Pass ?since=<previous "next"> to receive only the ones not seen yet.
+    """
+    since = request.args.get("since", 0, type=int)
+    with _jobs_lock:
+        record = _jobs.get(job_id)
+        # Someone else's job is reported exactly like a missing one
+        if record is None or record["owner"] != request.current_user["id"]:
+            return jsonify({"error": f"Unknown job: {job_id}"}), 404
+        events = record["events"][max(0, since):]
+        body = {
+            "job_id": job_id,
+            "status": record["status"],
+            "events": events,
+            "next":   max(0, since) + len(events),
+        }
+        if "result" in record and record["status"] in ("done", "failed"):
+            body["result"]      = record["result"]
+            body["http_status"] = record["http_status"]
+    return jsonify(body), 200
 
 
 # ---------------------------------------------------------------------------
 # Streaming endpoint — emits SSE events as the pipeline runs
 # ---------------------------------------------------------------------------
-@app.route("/api/analyze/stream", methods=["POST"])
-def analyze_stream():
+# A keepalive event is emitted once the stream has been silent this long —
+# well inside common proxy idle timeouts (nginx: 60 s), so consumers can
+# simply block on the next event.  Bursts of real events suppress it.
+STREAM_KEEPALIVE_SECONDS = 20
+
+# Events arriving within SSE_BATCH_WINDOW_SECONDS of the first one are sent
+# as a single {"type": "batch", "events": [...]} frame (at most SSE_BATCH_MAX
+# per frame) — one encode and one socket write per burst instead of per line.
+SSE_BATCH_MAX            = 32
+SSE_BATCH_WINDOW_SECONDS = 0.01
+
+# Streams are gzipped for clients that accept it — log events repeat the same
+# {"type":"log","tag":...} scaffolding, which deflate shrinks several-fold.
+# Set VELO_SSE_GZIP=0 when a proxy in front already compresses.
+SSE_GZIP: bool = os.getenv("VELO_SSE_GZIP", "1") != "0"
+
+
+def _sse_event(event: dict) -> bytes:
+    return b"data: " + _dumpb(event) + b"\n\n"
+
+
+def _sse_frame(events: list[dict]) -> bytes:
+    """One SSE frame for a burst of events — a lone event is sent as itself."""
+    if len(events) == 1:
+        return _sse_event(events[0])
+    return _sse_event({"type": "batch", "events": events})
+
+
+def _sse_headers(gzipped: bool = False) -> dict:
+    headers = {
+        "Cache-Control":       "no-cache",
+        "X-Accel-Buffering":   "no",
+        "Connection":          "keep-alive",
+        "Vary":                "Accept-Encoding",
+        "Access-Control-Allow-Origin": ALLOWED_ORIGINS,
+    }
+    if gzipped:
+        headers["Content-Encoding"] = "gzip"
+    return headers
+
+
+def _accepts_gzip(accept_encoding: str | None) -> bool:
+    """True if SSE_GZIP is on and the Accept-Encoding header allows gzip."""
+    if not SSE_GZIP:
+        return False
+    for part in (accept_encoding or "").replace(" ", "").lower().split(","):
+        coding, _, q = part.partition(";q=")
+        if coding == "gzip":
+            try:
+                return float(q or 1) > 0
+            except ValueError:
+                return True
+    return False
+
+
+class _SseGzip:
     """
-    Same healing pipeline as /api/analyze but streams live progress events
-    via Server-Sent Events (text/event-stream) so the frontend can show
-    a real-time terminal as the agent runs.
+    One gzip member per stream.  Every frame is sync-flushed, so it decodes
+    as soon as it arrives instead of sitting in the compressor's window.
+    """
+
+    def __init__(self) -> None:
+        self._zc = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def frame(self, data: bytes) -> bytes:
+        return self._zc.compress(data) + self._zc.flush(zlib.Z_SYNC_FLUSH)
+
+    def close(self) -> bytes:
+        return self._zc.flush()
 
-    Final event: {"type": "done", "data": <full response object>}
-    Log events:  {"type": "log",  "tag": "INFO|ERROR|AGENT|PATCH|PASS|BUG",
-                  "message": "..."}
+    def wrap(self, frames: Iterator[bytes]) -> Iterator[bytes]:
+        for data in frames:
+            yield self.frame(data)
+        yield self.close()
+
+
+def _parse_stream_request(data: dict | None, auth_header: str | None) -> tuple[dict | None, str | None]:
+    """
+    Validate a /api/analyze/stream body.  Returns (params, None) on success or
+    (None, error_message) for a 400.  Shared by the Flask route and asgi.py.
     """
-    data = request.get_json(silent=True)
     if not data:
-        return jsonify({"error": "Request body must be valid JSON."}), 400
+        return None, "Request body must be valid JSON."
 
     repo_url    = data.get("repo_url",    "").strip()
     team_name   = data.get("team_name",   "").strip()
     leader_name = data.get("leader_name", "").strip()
 
-    if not repo_url:    return jsonify({"error": "Missing required field: repo_url"}),    400
-    if not team_name:   return jsonify({"error": "Missing required field: team_name"}),   400
-    if not leader_name: return jsonify({"error": "Missing required field: leader_name"}), 400
-
-    if not leader_name: return jsonify({"error": "Missing required field: leader_name"}), 400
+    if not repo_url:    return None, "Missing required field: repo_url"
+    if not team_name:   return None, "Missing required field: team_name"
+    if not leader_name: return None, "Missing required field: leader_name"
 
-    # Retrieve auth token from header manually since we can't use @require_auth easily with streaming response generator?
-    # Actually we can, but let's just peek at the header for the stream endpoint to get the user token
+    # The stream endpoint is not behind @require_auth — peek at the header
+    # for the user's GitHub token when one is present
     user_token = None
-    auth_header = request.headers.get("Authorization")
     if auth_header and auth_header.startswith("Bearer "):
         jwt_token = auth_header[7:].strip()
         from auth import _verify_jwt
@@ -619,65 +1440,155 @@ def analyze_stream():
         if payload:
             user_token = payload.get("access_token")
 
-    event_q: queue.Queue = queue.Queue()
+    return {
+        "repo_url":    repo_url,
+        "team_name":   team_name,
+        "leader_name": leader_name,
+        "source_ref":  (data.get("commit_sha") or data.get("ref") or "").strip(),
+        "user_token":  user_token,
+    }, None
+
+
+def _keepalive_loop(emit, stop: threading.Event, last_event: list[float]) -> None:
+    """Emit a keepalive whenever nothing has been sent for STREAM_KEEPALIVE_SECONDS."""
+    timeout = STREAM_KEEPALIVE_SECONDS
+    while not stop.wait(timeout):
+        idle = time.monotonic() - last_event[0]
+        if idle >= STREAM_KEEPALIVE_SECONDS:
+            emit({"type": "keepalive"})
+            timeout = STREAM_KEEPALIVE_SECONDS
+        else:
+            timeout = STREAM_KEEPALIVE_SECONDS - idle
 
-    def emit(event: dict) -> None:
-        event_q.put(event)
 
-    def run_pipeline() -> None:
-        tmp_dir = None
+def _start_stream_run(params: dict, emit, keepalive: bool = True) -> None:
+    """
+    Queue a streaming run on the pipeline pool.  Keepalives start right away,
+    so the connection survives while the run waits for a free worker; `emit`
+    receives None once the run, and its results.json push, are over.  Pass keepalive=False when the
+    consumer times its own keepalives (the ASGI stream does, on its loop).
+    """
+    stop_keepalive = threading.Event()
+    if keepalive:
+        last_event = [time.monotonic()]
+        sink       = emit
+
+        def emit(event: dict | None) -> None:
+            last_event[0] = time.monotonic()
+            sink(event)
+
+        threading.Thread(
+            target=_keepalive_loop, args=(emit, stop_keepalive, last_event), name="velo-keepalive", daemon=True
+        ).start()
+
+    def finish(_=None) -> None:
+        stop_keepalive.set()
+        emit(None)  # Sentinel — ends the stream
+
+    def run() -> None:
+        pushes: list[Future] = []
         try:
-            emit({"type": "log", "tag": "INFO", "message": "Initializing Velo Autonomous Agent..."})
-            emit({"type": "log", "tag": "INFO", "message": f"Target: {repo_url}"})
+            _run_stream_pipeline(params, emit, pushes)
+        finally:
+            # Hold the stream open until results.json is pushed, so its
+            # outcome reaches the client; the worker is free meanwhile.
+            # Callbacks run in order, so _on_results_pushed emits first.
+            if pushes:
+                pushes[-1].add_done_callback(finish)
+            else:
+                finish()
 
-            tmp_dir = tempfile.mkdtemp(prefix="velo_stream_")
+    _, queued = _submit_run(run)
+    if queued:
+        emit({"type": "log", "tag": "INFO", "message": "All agent workers busy — run queued..."})
 
-            # Resolve clone URL — forks the repo automatically if the token owner
-            # differs from the repo owner, enabling push access to any public repo.
-            clone_url, fork_owner = _resolve_clone_url(repo_url, emit=emit, user_token=user_token)
+
+def _run_stream_pipeline(params: dict, emit, pushes: list[Future] | None = None) -> None:
+    """Clone + heal for the streaming endpoint, reporting everything via `emit`."""
+    repo_url   = params["repo_url"]
+    user_token = params["user_token"]
+    try:
+        emit({"type": "log", "tag": "INFO", "message": "Initializing Velo Autonomous Agent..."})
+        emit({"type": "log", "tag": "INFO", "message": f"Target: {repo_url}"})
+
+        # Resolve clone URL — forks the repo automatically if the token owner
+        # differs from the repo owner, enabling push access to any public repo.
+        clone_url, fork_owner = _resolve_clone_url(repo_url, emit=emit, user_token=user_token)
+        with _repo_workspace(clone_url) as work_dir:
             try:
-                git.Repo.clone_from(clone_url, tmp_dir)
+                _sync_workspace(work_dir, clone_url, params["source_ref"])
                 emit({"type": "log", "tag": "INFO", "message": "Repository cloned ✓"})
             except git.GitCommandError as exc:
                 emit({"type": "error", "message": f"Failed to clone repository: {exc}"})
                 return
 
-            response = _run_healing_loop(repo_url, team_name, leader_name, tmp_dir, emit=emit, fork_owner=fork_owner, user_token=user_token)
-            emit({"type": "done", "data": response})
+            response = _run_healing_loop(
+                repo_url, params["team_name"], params["leader_name"], work_dir,
+                emit=emit, fork_owner=fork_owner, user_token=user_token, pushes=pushes,
+            )
+        emit({"type": "done", "data": response})
 
-        except Exception as exc:
-            logger.exception("Unhandled error in streaming pipeline.")
-            emit({"type": "error", "message": str(exc)})
+    except Exception as exc:
+        logger.exception("Unhandled error in streaming pipeline.")
+        emit({"type": "error", "message": str(exc)})
 
-        finally:
-            if tmp_dir and os.path.exists(tmp_dir):
-                shutil.rmtree(tmp_dir, ignore_errors=True)
-            event_q.put(None)  # Sentinel — signals generator to close
 
-    thread = threading.Thread(target=run_pipeline, daemon=True)
-    thread.start()
+@app.route("/api/analyze/stream", methods=["POST"])
+def analyze_stream():
+    """
+    Same healing pipeline as /api/analyze but streams live progress events
+    via Server-Sent Events (text/event-stream) so the frontend can show
+    a real-time terminal as the agent runs.
+
+    Under the ASGI entry-point (asgi.py) this path is served natively by a
+    coroutine; this route backs the dev server.
+
+    Final event:     {"type": "done", "data": <full response object>}
+    Log events:      {"type": "log",  "tag": "INFO|ERROR|AGENT|PATCH|PASS|BUG",
+                      "message": "..."}
+    Timeline events: {"type": "timeline", "entry": <ci_timeline entry>} after
+                      each CI run, as they will appear in data.timeline
+    """
+    params, error = _parse_stream_request(
+        request.get_json(silent=True), request.headers.get("Authorization")
+    )
+    if error:
+        return jsonify({"error": error}), 400
+
+    # SimpleQueue: one C-level lock per put/get, and its put never blocks —
+    # the cheapest channel from the pipeline thread to this generator.
+    event_q: queue.SimpleQueue = queue.SimpleQueue()
+    _start_stream_run(params, event_q.put)
 
     def generate():
         while True:
-            try:
-                event = event_q.get(timeout=360)  # 6-min hard timeout
-                if event is None:
-                    return
-                yield f"data: {json.dumps(event)}\n\n"
-            except queue.Empty:
-                # Send keepalive so the browser doesn't close the connection
-                yield "data: {\"type\":\"keepalive\"}\n\n"
-
-    resp_headers = {
-        "Cache-Control":       "no-cache",
-        "X-Accel-Buffering":   "no",
-        "Connection":          "keep-alive",
-        "Access-Control-Allow-Origin": os.getenv("ALLOWED_ORIGINS", "*"),
-    }
+            # Keepalives arrive as ordinary events from the pipeline side
+            event = event_q.get()
+            # Let the rest of the burst land, then drain it
+            time.sleep(SSE_BATCH_WINDOW_SECONDS)
+            batch = []
+            while event is not None:
+                batch.append(event)
+                if len(batch) >= SSE_BATCH_MAX:
+                    yield _sse_frame(batch)
+                    batch = []
+                try:
+                    event = event_q.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                yield _sse_frame(batch)
+            if event is None:
+                return
+
+    gzip_enc = _SseGzip() if _accepts_gzip(request.headers.get("Accept-Encoding")) else None
+    frames   = generate() if gzip_enc is None else gzip_enc.wrap(generate())
+    # Frames are already bytes: passthrough hands them to the server as-is
     return Response(
-        stream_with_context(generate()),
+        stream_with_context(frames),
         mimetype="text/event-stream",
-        headers=resp_headers,
+        headers=_sse_headers(gzipped=gzip_enc is not None),
+        direct_passthrough=True,
     )
 
 
@@ -0,0 +1,130 @@
+"""
+asgi.py — Velo production entry-point (ASGI)
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+
+The dev server (python app.py) parks one thread per open /api/analyze/stream
+response on a blocking queue.get for the whole pipeline run.  Here that path
+is served natively instead: the SSE consumer is a coroutine awaiting an
+asyncio.Queue, so an in-flight stream holds no server thread — only the
+pipeline's own worker thread — and its keepalives are timed on the event
+loop.  Every other route is the unchanged Flask app, run on a2wsgi's
+thread pool.
+"""
+
+import asyncio
+import os
+import time
+
+from a2wsgi import WSGIMiddleware
+
+from app import (
+    app,
+    ALLOWED_ORIGINS,
+    SSE_BATCH_MAX,
+    SSE_BATCH_WINDOW_SECONDS,
+    STREAM_KEEPALIVE_SECONDS,
+    _dumpb,
+    _loads,
+    _accepts_gzip,
+    _parse_stream_request,
+    _SseGzip,
+    _start_stream_run,
+    _sse_frame,
+    _sse_headers,
+)
+
+_STREAM_PATH = "/api/analyze/stream"
+
+# Threads for the plain Flask routes (the blocking /api/analyze among them)
+WSGI_WORKERS: int = int(os.getenv("VELO_WSGI_WORKERS", 16))
+
+_flask_app = WSGIMiddleware(app, workers=WSGI_WORKERS)
+
+
+def _encode_headers(headers: dict) -> list[tuple[bytes, bytes]]:
+    return [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()]
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    return b"".join(chunks)
+
+
+async def _send_json(send, status: int, payload: dict) -> None:
+    body = _dumpb(payload)
+    headers = {
+        "Content-Type": "application/json",
+        "Access-Control-Allow-Origin": ALLOWED_ORIGINS,
+    }
+    await send({"type": "http.response.start", "status": status, "headers": _encode_headers(headers)})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _analyze_stream(scope, receive, send) -> None:
+    """ASGI twin of app.analyze_stream — same validation, pipeline and events."""
+    body = await _read_body(receive)
+    try:
+        data = _loads(body) if body else None
+    except ValueError:
+        data = None
+    req_headers = {k: v.decode("latin-1") for k, v in scope.get("headers", [])}
+    auth_header = req_headers.get(b"authorization")
+    params, error = _parse_stream_request(data if isinstance(data, dict) else None, auth_header)
+    if error:
+        await _send_json(send, 400, {"error": error})
+        return
+
+    loop    = asyncio.get_running_loop()
+    event_q: asyncio.Queue = asyncio.Queue()
+
+    def emit(event: dict | None) -> None:
+        # Called from the pipeline thread — hand the event to the loop
+        loop.call_soon_threadsafe(event_q.put_nowait, event)
+
+    # Keepalives come from this coroutine's own timeout below, so the run
+    # needs no keepalive thread of its own
+    _start_stream_run(params, emit, keepalive=False)
+
+    gzip_enc = _SseGzip() if _accepts_gzip(req_headers.get(b"accept-encoding")) else None
+    headers  = {"Content-Type": "text/event-stream", **_sse_headers(gzipped=gzip_enc is not None)}
+    await send({"type": "http.response.start", "status": 200, "headers": _encode_headers(headers)})
+    while True:
+        try:
+            event = await asyncio.wait_for(event_q.get(), STREAM_KEEPALIVE_SECONDS)
+        except asyncio.TimeoutError:
+            event = {"type": "keepalive"}
+        # Coalesce whatever else arrives within the batch window
+        batch    = []
+        deadline = time.monotonic() + SSE_BATCH_WINDOW_SECONDS
+        while event is not None:
+            batch.append(event)
+            remaining = deadline - time.monotonic()
+            if len(batch) >= SSE_BATCH_MAX or remaining <= 0:
+                break
+            try:
+                event = await asyncio.wait_for(event_q.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+        if batch:
+            frame = _sse_frame(batch)
+            if gzip_enc:
+                frame = gzip_enc.frame(frame)
+            await send({"type": "http.response.body", "body": frame, "more_body": True})
+        if event is None:
+            break
+    await send({"type": "http.response.body", "body": gzip_enc.close() if gzip_enc else b""})
+
+
+async def application(scope, receive, send) -> None:
+    if scope["type"] == "http" and scope["path"] == _STREAM_PATH and scope["method"] == "POST":
+        await _analyze_stream(scope, receive, send)
+    else:
+        await _flask_app(scope, receive, send)
@@ -7,15 +7,21 @@ Flow:
 Protected routes expect: Authorization: Bearer <jwt>
 """
 
+import hashlib
 import os
 import secrets
 import logging
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
 from urllib.parse import urlencode
 
 import requests
-from flask import request, jsonify, redirect
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from flask import g, request, jsonify, redirect
 
 logger = logging.getLogger("velo.auth")
 
@@ -31,14 +37,49 @@ JWT_EXPIRY_SECONDS = int(os.getenv("JWT_EXPIRY_SECONDS", "86400"))  # 24h
 GITHUB_AUTHORIZE_URL = "https://github.com/login/oauth/authorize"
 GITHUB_TOKEN_URL = "https://github.com/login/oauth/access_token"
 GITHUB_USER_URL = "https://api.github.com/user"
+GITHUB_EMAILS_URL = "https://api.github.com/user/emails"
+
+# Pooled keep-alive session for the callback's token exchange and user
+# lookups, so they share warm TLS connections to github.com / api.github.com.
+# Retry's defaults leave POST out, so a single-use code is never resent.
+_gh_session = requests.Session()
+_gh_session.headers.update({"Accept": "application/json"})
+_gh_session.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504]),
+))
+# Runs the /user/emails lookup alongside /user, which it does not depend on
+_profile_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="velo-oauth")
+
+
+def _fetch_primary_email(access_token: str) -> str:
+    """Primary address from /user/emails, or "" when unavailable."""
+    try:
+        em_resp = _gh_session.get(
+            GITHUB_EMAILS_URL,
+            headers={"Authorization": f"Bearer {access_token}", "Accept": "application/vnd.github.v3+json"},
+            timeout=5,
+        )
+        if em_resp.ok:
+            for e in em_resp.json():
+                if e.get("primary"):
+                    return (e.get("email") or "").strip()
+    except Exception:
+        pass
+    return ""
+
+
+# PyJWT is imported at startup rather than inside the first authenticated
+# request; None keeps the "PyJWT not installed" behaviour below.
+try:
+    import jwt as _pyjwt
+except ImportError:  # pragma: no cover
+    _pyjwt = None
 
 
 def _load_jwt():
-    try:
-        import jwt as pyjwt
-        return pyjwt
-    except ImportError:
-        return None
+    return _pyjwt
 
 
 def _issue_jwt(user: dict) -> str:
@@ -57,19 +98,42 @@ def _issue_jwt(user: dict) -> str:
     return jwt_mod.encode(payload, JWT_SECRET, algorithm="HS256")
 
 
+# Verified tokens, so a polling dashboard doesn't re-run HMAC + JSON decode
+# on every request.  LRU keyed by a digest of the token; an entry is only
+# served until the token's own exp, and for at most _JWT_CACHE_TTL seconds.
+_JWT_CACHE_SIZE = 4096
+_JWT_CACHE_TTL = 300
+_jwt_cache: "OrderedDict[bytes, tuple[dict, float]]" = OrderedDict()
+_jwt_cache_lock = threading.Lock()
+
+
 def _verify_jwt(token: str) -> dict | None:
     """Verify JWT and return payload or None."""
     jwt_mod = _load_jwt()
     if not jwt_mod or not token:
         return None
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    now = time.time()
+    with _jwt_cache_lock:
+        hit = _jwt_cache.get(key)
+        if hit is not None:
+            if hit[1] > now:
+                _jwt_cache.move_to_end(key)
+                return hit[0]
+            del _jwt_cache[key]
     try:
-        return jwt_mod.decode(token, JWT_SECRET, algorithms=["HS256"])
+        payload = jwt_mod.decode(token, JWT_SECRET, algorithms=["HS256"])
     except Exception:
         return None
+    expires = min(float(payload.get("exp") or now), now + _JWT_CACHE_TTL)
+    with _jwt_cache_lock:
+        _jwt_cache[key] = (payload, expires)
+        if len(_jwt_cache) > _JWT_CACHE_SIZE:
+            _jwt_cache.popitem(last=False)
+    return payload
 
 
-def get_current_user() -> dict | None:
-    """Read Authorization: Bearer <jwt> and return user dict or None."""
+def _user_from_header() -> dict | None:
     auth = request.headers.get("Authorization")
     if not auth or not auth.startswith("Bearer "):
         return None
@@ -85,6 +149,13 @@ def get_current_user() -> dict | None:
     }
 
 
+def get_current_user() -> dict | None:
+    """Read Authorization: Bearer <jwt> and return user dict or None (memoized per request on g)."""
+    if "_velo_user" not in g:
+        g._velo_user = _user_from_header()
+    return g._velo_user
+
+
 def require_auth(f):
     """Decorator: require valid JWT. Sets request.current_user; 401 if missing/invalid."""
     @wraps(f)
@@ -126,9 +197,8 @@ def github_oauth_callback():
         return redirect(FRONTEND_URL + "/auth?error=invalid_state", code=302)
 
     # Exchange code for access_token
-    token_resp = requests.post(
+    token_resp = _gh_session.post(
         GITHUB_TOKEN_URL,
-        headers={"Accept": "application/json"},
         data={
             "client_id": GITHUB_CLIENT_ID,
             "client_secret": GITHUB_CLIENT_SECRET,
@@ -145,8 +215,9 @@ def github_oauth_callback():
         logger.warning("GitHub token response: no access_token")
         return redirect(FRONTEND_URL + "/auth?error=no_token", code=302)
 
-    # Fetch GitHub user
-    user_resp = requests.get(
+    # Fetch GitHub user; the emails fallback is fetched concurrently
+    email_future = _profile_pool.submit(_fetch_primary_email, access_token)
+    user_resp = _gh_session.get(
         GITHUB_USER_URL,
         headers={"Authorization": f"Bearer {access_token}", "Accept": "application/vnd.github.v3+json"},
         timeout=10,
@@ -157,25 +228,11 @@ def github_oauth_callback():
         "id": gh_user.get("id"),
         "login": gh_user.get("login", ""),
         "email": (gh_user.get("email") or "").strip(),
-        "email": (gh_user.get("email") or "").strip(),
         "avatar_url": gh_user.get("avatar_url"),
         "access_token": access_token,  # Pass token to _issue_jwt
     }
     if not user["email"]:
-        # Try emails API
-        try:
-            em_resp = requests.get(
-                "https://api.github.com/user/emails",
-                headers={"Authorization": f"Bearer {access_token}", "Accept": "application/vnd.github.v3+json"},
-                timeout=5,
-            )
-            if em_resp.ok:
-                for e in em_resp.json():
-                    if e.get("primary"):
-                        user["email"] = (e.get("email") or "").strip()
-                        break
-        except Exception:
-            pass
+        user["email"] = email_future.result()
 
     try:
         jwt_token = _issue_jwt(user)
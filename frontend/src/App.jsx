@@ -338,15 +338,25 @@ function AppContent() {
               const line = part.trim();
               if (!line.startsWith('data: ')) continue;
               try {
-                const event = JSON.parse(line.slice(6));
-                if (event.type === 'keepalive') continue;
-
-                if (event.type === 'done') {
-                  setResults({ ...event.data, liveLog: liveLogRef.current });
-                } else if (event.type === 'error') {
-                  setError(event.message || 'Analysis failed.');
-                } else if (event.type === 'log') {
-                  const updated = [...liveLogRef.current, event];
+                const frame = JSON.parse(line.slice(6));
+                // The backend coalesces bursts of events into one batch frame
+                const events = frame.type === 'batch' ? frame.events : [frame];
+                const logs = [];
+
+                for (const event of events) {
+                  if (event.type === 'keepalive') continue;
+
+                  if (event.type === 'done') {
+                    setResults({ ...event.data, liveLog: [...liveLogRef.current, ...logs] });
+                  } else if (event.type === 'error') {
+                    setError(event.message || 'Analysis failed.');
+                  } else if (event.type === 'log') {
+                    logs.push(event);
+                  }
+                }
+
+                if (logs.length) {
+                  const updated = [...liveLogRef.current, ...logs];
                   liveLogRef.current = updated;
                   setLiveLog([...updated]);
                 }